@@ -2,21 +2,41 @@
 # tested on rasberry pi zero 2 w with IMX
 
 from picamera2 import Picamera2, encoders
-from picamera2.outputs import FfmpegOutput
+from picamera2.outputs import FileOutput
+import os
+import subprocess
+import threading
 import time
 import signal
 from datetime import datetime
 
-running = True
+stop_event = threading.Event()
 
 def handle_sigint(signum, frame):
-    global running
     print("\nStopping recording...")
-    running = False
+    stop_event.set()
 
 signal.signal(signal.SIGINT, handle_sigint)
 
+class CountingFileOutput(FileOutput):
+    # count bytes as the encoder hands them over, so we never have to stat
+    # the file to know how big the recording is
+    def __init__(self, file):
+        super().__init__(file)
+        self.bytes_written = 0
+
+    def outputframe(self, frame, *args, **kwargs):
+        self.bytes_written += len(frame)
+        super().outputframe(frame, *args, **kwargs)
+
 def main():
+    # refuse to run without the bcm2835-codec hardware H264 encoder - a silent
+    # fallback to software x264 would peg the CPU on a pi zero
+    if not os.path.exists("/dev/video11"):
+        raise SystemExit("hardware H264 encoder (/dev/video11) not found - "
+                         "is this running on a Pi with bcm2835-codec enabled?")
+    print("Using hardware H264 encoder at /dev/video11")
+
     picam2 = Picamera2()
 
     video_config = picam2.create_video_configuration(
@@ -25,24 +45,44 @@ def main():
     )
     picam2.configure(video_config)
 
-    encoder = encoders.H264Encoder(bitrate=5_000_000)
+    encoder = encoders.H264Encoder(bitrate=5_000_000, repeat=True, iperiod=30)
 
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    filename = f"video_{timestamp}.mp4"
+    raw_path = f"video_{timestamp}.h264"
+    mp4_path = f"video_{timestamp}.mp4"
 
-    output = FfmpegOutput(filename)
+    # write the raw H264 stream straight to disk - no ffmpeg process running
+    # alongside the capture, which matters on a pi zero
+    output = CountingFileOutput(open(raw_path, "wb"))
 
     picam2.start()
     picam2.start_recording(encoder, output)
-    print(f"Recording started. Writing to {filename}. Press Ctrl+C to stop.")
+    # monotonic clock so the reported duration can't be skewed by NTP steps
+    start_ns = time.monotonic_ns()
+    print(f"Recording started. Writing to {raw_path}. Press Ctrl+C to stop.")
 
     try:
-        while running:
-            time.sleep(1)
+        # block until Ctrl+C signals the event - no once-a-second wakeups
+        stop_event.wait()
     finally:
+        elapsed_s = (time.monotonic_ns() - start_ns) // 1_000_000_000
         picam2.stop_recording()
         picam2.stop()
-        print(f"Recording stopped. Saved to {filename}!")
+        # one-shot remux into mp4 - the stream is already H264 so this is a
+        # container copy, not a re-encode
+        # fragmented mp4: the file is playable even if the remux (or a later
+        # copy off the sd card) gets interrupted, since there is no single
+        # moov atom written only at the very end
+        subprocess.run(
+            ["ffmpeg", "-y", "-framerate", "30", "-i", raw_path,
+             "-c", "copy",
+             "-movflags", "+frag_keyframe+empty_moov+default_base_moof",
+             mp4_path],
+            check=True,
+        )
+        os.unlink(raw_path)
+        print(f"Recording stopped. Captured {output.bytes_written} bytes "
+              f"over {elapsed_s}s, saved to {mp4_path}!")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file